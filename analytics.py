@@ -0,0 +1,124 @@
+"""Per-event betting statistics, computed with pandas.
+
+The caller reads every bet in an event into one DataFrame (see
+``event_bets_frame`` in app.py) with these columns:
+
+    bet_id, user_roll_number, points, question_id, question_text,
+    winning_option_id, option_id, option_text, odds, amount, status
+
+Everything here is a vectorized group-by over that frame, so the cost stays
+linear in the number of bets and no Python loop runs per bet. The result is
+plain JSON-serializable data for both the admin page and the JSON endpoint.
+"""
+import numpy as np
+import pandas as pd
+
+ROI_PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def _number(value):
+    """Converts numpy scalars to Python numbers and NaN to None for JSON."""
+    if value is None or pd.isna(value):
+        return None
+    return value.item() if hasattr(value, 'item') else value
+
+
+def gini(values):
+    """Gini coefficient of non-negative values: 0 is perfect equality, 1 is maximal inequality."""
+    values = np.sort(np.clip(np.asarray(values, dtype=float), 0, None))
+    n = len(values)
+    if n == 0 or values.sum() == 0:
+        return 0.0
+    ranks = np.arange(1, n + 1)
+    return float((2 * (ranks * values).sum()) / (n * values.sum()) - (n + 1) / n)
+
+
+def top_share(values, fraction=0.1):
+    """Share of the total held by the top ``fraction`` of holders."""
+    values = np.sort(np.asarray(values, dtype=float))[::-1]
+    if len(values) == 0 or values.sum() <= 0:
+        return 0.0
+    top_n = max(1, int(np.ceil(len(values) * fraction)))
+    return float(values[:top_n].sum() / values.sum())
+
+
+def option_breakdown(bets):
+    """Bets, stake and share of the question's stake for each option that received bets."""
+    per_option = bets.groupby(['question_id', 'option_id'], sort=True).agg(
+        option_text=('option_text', 'first'),
+        bets=('bet_id', 'size'),
+        stake=('amount', 'sum'),
+        potential_payout=('potential_payout', 'sum'),
+    )
+    per_option['share'] = per_option['stake'] / per_option.groupby(level='question_id')['stake'].transform('sum')
+    return per_option.reset_index()
+
+
+def question_breakdown(bets, per_option, eligible_users):
+    """Stake, participation and house result per question."""
+    per_question = bets.groupby('question_id', sort=True).agg(
+        question_text=('question_text', 'first'),
+        winning_option_id=('winning_option_id', 'first'),
+        bets=('bet_id', 'size'),
+        stake=('amount', 'sum'),
+        payout=('payout', 'sum'),
+    )
+    per_question['settled'] = per_question['winning_option_id'].notna()
+    per_question['participation_rate'] = per_question['bets'] / eligible_users if eligible_users else np.nan
+    # Winners are paid stake * odds, so the house keeps whatever that leaves.
+    per_question['house_net'] = (per_question['stake'] - per_question['payout']).where(per_question['settled'])
+    # For unsettled questions: the house result if the most expensive option wins.
+    worst_payout = per_option.groupby('question_id')['potential_payout'].max()
+    per_question['worst_case_house_net'] = (per_question['stake'] - worst_payout).where(~per_question['settled'])
+    return per_question.reset_index()
+
+
+def roi_percentiles(bets):
+    """Distribution of each bettor's return on their settled stake in this event."""
+    settled = bets[bets['status'] != 'Pending']
+    per_user = settled.groupby('user_roll_number').agg(stake=('amount', 'sum'), payout=('payout', 'sum'))
+    per_user = per_user[per_user['stake'] > 0]
+    if per_user.empty:
+        return {f'p{p}': None for p in ROI_PERCENTILES}, 0
+    roi = (per_user['payout'] - per_user['stake']) / per_user['stake']
+    quantiles = np.percentile(roi.to_numpy(), ROI_PERCENTILES)
+    return {f'p{p}': float(q) for p, q in zip(ROI_PERCENTILES, quantiles)}, len(per_user)
+
+
+def summarize_event(event_id, bets, eligible_users):
+    """Builds every statistic for one event from its bets DataFrame."""
+    bets = bets.copy()
+    # Same truncation as process_results applies when crediting winnings.
+    bets['potential_payout'] = np.trunc(bets['amount'] * bets['odds'])
+    bets['payout'] = bets['potential_payout'].where(bets['status'] == 'Won', 0)
+
+    bettors = bets.drop_duplicates('user_roll_number')
+    summary = {
+        'event_id': event_id,
+        'bets': int(len(bets)),
+        'bettors': int(len(bettors)),
+        'eligible_users': int(eligible_users),
+        'participation_rate': len(bettors) / eligible_users if eligible_users else None,
+        'total_stake': int(bets['amount'].sum()),
+        'questions': [],
+        'roi_percentiles': {f'p{p}': None for p in ROI_PERCENTILES},
+        'roi_users': 0,
+        # Measured over the current points of this event's bettors.
+        'inequality': {'gini': gini(bettors['points']), 'top_10_percent_share': top_share(bettors['points'])},
+    }
+    if bets.empty:
+        return summary
+
+    per_option = option_breakdown(bets)
+    options_by_question = {
+        question_id: group.drop(columns=['question_id', 'potential_payout']).to_dict('records')
+        for question_id, group in per_option.groupby('question_id', sort=False)
+    }
+    for row in question_breakdown(bets, per_option, eligible_users).to_dict('records'):
+        question = {key: _number(value) for key, value in row.items()}
+        question['options'] = [{key: _number(value) for key, value in option.items()}
+                               for option in options_by_question[row['question_id']]]
+        summary['questions'].append(question)
+
+    summary['roi_percentiles'], summary['roi_users'] = roi_percentiles(bets)
+    return summary
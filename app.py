@@ -1,36 +1,101 @@
 import os
-import io
 from datetime import datetime, timedelta
-from flask import (Flask, render_template, request, redirect, url_for,
-                   flash, session, send_file, jsonify)
+from flask import (Blueprint, Flask, current_app, g, render_template, request, redirect, url_for,
+                   flash, session, send_file, jsonify, make_response)
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
-from openpyxl import Workbook
 from io import BytesIO
-from openpyxl.styles import PatternFill
-from functools import wraps
+from functools import partial, wraps
 import jwt
 from flask_cors import CORS
-
-# --- APP CONFIGURATION ---
-app = Flask(__name__)
-CORS(app)
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'a_very_secure_and_random_secret_key_for_dev')
-
-app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY','a-different-super-strong-secret-for-dev')
-
-# Use PostgreSQL if DATABASE_URL is set (in production), otherwise use SQLite (for local development)
-DATABASE_URL = os.environ.get('DATABASE_URL')
-if DATABASE_URL:
-    # The Neon URL starts with postgres://, but SQLAlchemy needs postgresql://
-    app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL.replace("postgres://", "postgresql://", 1)
-else:
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///stratabet.db'
-
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-db = SQLAlchemy(app)
-bcrypt = Bcrypt(app)
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session as OrmSession
+from fragment_cache import FragmentCache
+from sheet_cache import SheetCache
+from ratelimit import RateLimiter, MemoryBucketStore, SQLiteBucketStore
+from bet_ingest import GroupCommitQueue, QueueTimeout
+
+# --- EXTENSIONS ---
+# Created unbound so create_app() can attach them to any number of app instances.
+db = SQLAlchemy()
+bcrypt = Bcrypt()
+cors = CORS()
+bp = Blueprint('main', __name__, cli_group=None)
+
+
+# --- APP FACTORY ---
+def default_database_uri():
+    # Use PostgreSQL if DATABASE_URL is set (in production), otherwise use SQLite (for local development)
+    database_url = os.environ.get('DATABASE_URL')
+    if database_url:
+        # The Neon URL starts with postgres://, but SQLAlchemy needs postgresql://
+        return database_url.replace("postgres://", "postgresql://", 1)
+    return 'sqlite:///stratabet.db'
+
+
+def create_app(config=None):
+    """Builds a configured app. ``config`` overrides the environment-derived defaults."""
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'a_very_secure_and_random_secret_key_for_dev')
+    app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY','a-different-super-strong-secret-for-dev')
+    app.config['SQLALCHEMY_DATABASE_URI'] = default_database_uri()
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['FRAGMENT_CACHE_MAX_BYTES'] = int(os.environ.get('FRAGMENT_CACHE_MAX_BYTES', 8 * 1024 * 1024))
+    # None lets Jinja pick a per-user directory under the system temp dir.
+    app.config['JINJA_BYTECODE_CACHE_DIR'] = os.environ.get('JINJA_BYTECODE_CACHE_DIR')
+    app.config['EXPORT_CACHE_DIR'] = os.environ.get('EXPORT_CACHE_DIR')
+    # (requests, per seconds) for each client, keyed separately by IP and by roll number.
+    app.config['RATE_LIMITS'] = {'login': (10, 60), 'bet': (30, 60)}
+    # Path to a SQLite file to share buckets between gunicorn workers; in-process if unset.
+    app.config['RATE_LIMIT_STORAGE'] = os.environ.get('RATE_LIMIT_STORAGE')
+    # Requests allowed in flight per process before new ones are shed with a 503.
+    app.config['MAX_CONCURRENT_REQUESTS'] = int(os.environ.get('MAX_CONCURRENT_REQUESTS', 64))
+    # 'direct' commits each bet on its own; 'batched' group-commits bets on one writer thread.
+    app.config['BET_INGEST_MODE'] = os.environ.get('BET_INGEST_MODE', 'direct')
+    app.config['BET_BATCH_MAX_SIZE'] = int(os.environ.get('BET_BATCH_MAX_SIZE', 64))
+    app.config['BET_BATCH_MAX_WAIT'] = float(os.environ.get('BET_BATCH_MAX_WAIT', 0.005))
+    app.config['BET_INGEST_TIMEOUT'] = float(os.environ.get('BET_INGEST_TIMEOUT', 5))
+    if config:
+        app.config.update(config)
+    if not app.config['EXPORT_CACHE_DIR']:
+        app.config['EXPORT_CACHE_DIR'] = os.path.join(app.instance_path, 'export_cache')
+
+    # Must be set before app.jinja_env is first touched, which creates the environment.
+    app.jinja_options = {**app.jinja_options,
+                         'bytecode_cache': FileSystemBytecodeCache(app.config['JINJA_BYTECODE_CACHE_DIR'])}
+    app.extensions['fragment_cache'] = FragmentCache(app.config['FRAGMENT_CACHE_MAX_BYTES'])
+    # event id -> (event version, summary); one small entry per event.
+    app.extensions['analytics_cache'] = {}
+    app.add_template_global(render_fragment)
+    store = (SQLiteBucketStore(app.config['RATE_LIMIT_STORAGE']) if app.config['RATE_LIMIT_STORAGE']
+             else MemoryBucketStore())
+    app.extensions['rate_limiter'] = RateLimiter(app.config['RATE_LIMITS'], store,
+                                                 app.config['MAX_CONCURRENT_REQUESTS'])
+    app.extensions['bet_ingest'] = GroupCommitQueue(partial(commit_bet_batch, app),
+                                                    app.config['BET_BATCH_MAX_SIZE'],
+                                                    app.config['BET_BATCH_MAX_WAIT'],
+                                                    app.config['BET_INGEST_TIMEOUT'])
+    app.before_request(admit_request)
+    app.teardown_request(release_request_slot)
+
+    db.init_app(app)
+    bcrypt.init_app(app)
+    cors.init_app(app)
+    app.register_blueprint(bp)
+    return app
+
+
+def dispose_engines(app):
+    """Drops pooled connections inherited from a parent process.
+
+    Call this in each worker after forking from a preloaded app (see
+    gunicorn.conf.py) so workers never share database sockets with the master.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
 
 
 # --- DATABASE MODELS (Unchanged)---
@@ -154,6 +219,137 @@ class Team(db.Model):
             'name': self.name,
             'squad': self.squad
         }
+
+# Second alias of Option for joining a question's winning option alongside a bet's chosen one.
+WinningOption = db.aliased(Option)
+
+
+class DataVersion(db.Model):
+    """Change counter per data scope; rendered-fragment and export cache keys include it."""
+    scope = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+
+# --- DATA VERSION STAMPS ---
+# Which version scopes a change to each model invalidates.
+VERSION_SCOPES = {
+    User: ('users',),
+    Bet: ('bets',),
+    Event: ('questions',),
+    Question: ('questions',),
+    Option: ('questions',),
+    Team: ('teams',),
+}
+
+def bump_data_versions(session, scopes):
+    """Increments the given scopes inside the session's current transaction.
+
+    Called automatically for ORM flushes; bulk statements that bypass the unit
+    of work must call it themselves.
+    """
+    if not scopes:
+        return
+    connection = session.connection()
+    dialect = postgresql if connection.dialect.name == 'postgresql' else sqlite
+    table = DataVersion.__table__
+    # Sorted so concurrent writers always lock version rows in the same order.
+    now = datetime.utcnow()
+    stmt = dialect.insert(table).values([{'scope': scope, 'version': 1, 'updated_at': now}
+                                         for scope in sorted(scopes)])
+    stmt = stmt.on_conflict_do_update(index_elements=[table.c.scope],
+                                      set_={'version': table.c.version + 1, 'updated_at': now})
+    connection.execute(stmt)
+
+def event_scope(event_id):
+    """Version scope covering one event: its name, questions, options, bets and settlements."""
+    return f'event:{event_id}'
+
+def event_id_for(session, obj):
+    """The event a changed Bet, Option, Question or Event belongs to, or None if it has none yet."""
+    if isinstance(obj, Event):
+        return obj.id
+    if isinstance(obj, (Bet, Option)):
+        obj = obj.question if obj.question_id is None else session.get(Question, obj.question_id)
+    if isinstance(obj, Question):
+        return obj.event_id if obj.event_id is not None else getattr(obj.event, 'id', None)
+    return None
+
+@event.listens_for(OrmSession, 'before_flush')
+def bump_versions_on_flush(session, flush_context, instances):
+    changed = list(session.new) + list(session.deleted)
+    changed.extend(obj for obj in session.dirty if session.is_modified(obj))
+    scopes = set()
+    for obj in changed:
+        scopes.update(VERSION_SCOPES.get(type(obj), ()))
+        event_id = event_id_for(session, obj)
+        if event_id is not None:
+            scopes.add(event_scope(event_id))
+    bump_data_versions(session, scopes)
+
+def get_data_versions(scopes):
+    """Current version of each scope, read once per request."""
+    known = g.setdefault('data_versions', {})
+    missing = [scope for scope in scopes if scope not in known]
+    if missing:
+        rows = db.session.execute(
+            db.select(DataVersion.scope, DataVersion.version).where(DataVersion.scope.in_(missing))
+        )
+        known.update({scope: 0 for scope in missing})
+        known.update(rows.all())
+    return tuple(known[scope] for scope in scopes)
+
+def render_fragment(template_name, scopes, key=None, context=None):
+    """Renders a template fragment, serving cached HTML while its data scopes are unchanged.
+
+    ``context`` may be a dict or a callable returning one; a callable is only
+    invoked on a cache miss, so the queries behind the fragment are skipped on a hit.
+    """
+    cache_key = (template_name, key, tuple(scopes), get_data_versions(scopes))
+
+    def render():
+        values = context() if callable(context) else (context or {})
+        return render_template(template_name, **values)
+
+    return current_app.extensions['fragment_cache'].get_or_render(cache_key, render)
+
+
+# --- EVENT ANALYTICS ---
+def event_bets_frame(event_id):
+    """Reads every bet in an event, with its option, question and bettor, in one query."""
+    import pandas as pd
+
+    stmt = (
+        db.select(
+            Bet.id.label('bet_id'), Bet.user_roll_number, User.points,
+            Question.id.label('question_id'), Question.text.label('question_text'), Question.winning_option_id,
+            Option.id.label('option_id'), Option.text.label('option_text'), Option.odds,
+            Bet.amount, Bet.status,
+        )
+        .join(Question, Bet.question_id == Question.id)
+        .join(Option, Bet.option_id == Option.id)
+        .join(User, Bet.user_roll_number == User.roll_number)
+        .where(Question.event_id == event_id)
+    )
+    return pd.read_sql(stmt, db.session.connection())
+
+def get_event_analytics(event_id):
+    """Event statistics, recomputed only when the event's bets or settlements change."""
+    version = get_data_versions([event_scope(event_id)])[0]
+    cache = current_app.extensions['analytics_cache']
+    cached = cache.get(event_id)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    # pandas is admin-only and slow to import, so it loads on first use.
+    import analytics
+
+    eligible_users = db.session.scalar(db.select(db.func.count()).select_from(User).where(User.is_admin == False))
+    summary = analytics.summarize_event(event_id, event_bets_frame(event_id), eligible_users)
+    cache[event_id] = (version, summary)
+    return summary
+
+
 # --- HELPER FUNCTIONS & SETUP (Unchanged) ---
 def get_current_user():
     if 'roll_number' in session:
@@ -165,11 +361,41 @@ def admin_required(f):
         user = get_current_user()
         if not user or not user.is_admin:
             flash("You do not have permission to access this page.", "danger")
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
         return f(*args, **kwargs)
     decorated_function.__name__ = f.__name__
     return decorated_function
 
+# --- ADMISSION CONTROL ---
+def too_many_requests(message, retry_after, status=429):
+    """Rejection response: JSON for the API, plain text for the web pages."""
+    headers = {'Retry-After': str(retry_after)}
+    if request.path.startswith('/api/'):
+        return jsonify({'message': message}), status, headers
+    return make_response(message, status, headers)
+
+def check_rate_limit(name, roll_number=None):
+    """Applies the named limit to this client; returns a 429 response when it is exceeded."""
+    limiter = current_app.extensions['rate_limiter']
+    retry_after = limiter.check(name, [('ip', request.remote_addr), ('user', roll_number)])
+    if retry_after is None:
+        return None
+    current_app.logger.warning("Rate limit '%s' exceeded by %s (%s).", name, request.remote_addr, roll_number)
+    return too_many_requests(f'Too many requests. Please try again in {retry_after} seconds.', retry_after)
+
+def admit_request():
+    """Sheds load before it reaches the database once too many requests are in flight."""
+    if request.endpoint == 'static':
+        return None
+    if not current_app.extensions['rate_limiter'].acquire_slot():
+        return too_many_requests('The server is busy. Please try again shortly.', 1, status=503)
+    g.holds_request_slot = True
+    return None
+
+def release_request_slot(exc=None):
+    if g.pop('holds_request_slot', False):
+        current_app.extensions['rate_limiter'].release_slot()
+
 # NEW: Token decorator for API
 def token_required(f):
     @wraps(f)
@@ -181,7 +407,7 @@ def token_required(f):
         if not token:
             return jsonify({'message': 'Token is missing!'}), 401
         try:
-            data = jwt.decode(token, app.config['JWT_SECRET_KEY'], algorithms=["HS256"])
+            data = jwt.decode(token, current_app.config['JWT_SECRET_KEY'], algorithms=["HS256"])
             current_user = User.query.get(data['roll_number'])
             if not current_user:
                 return jsonify({'message': 'User not found!'}), 401
@@ -193,10 +419,69 @@ def token_required(f):
         return f(current_user, *args, **kwargs)
     return decorated
 
+# --- BET PLACEMENT ---
+class BetRejected(Exception):
+    """A bet that failed validation; carries the API status and the flash category."""
+    def __init__(self, message, status, category='warning'):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.category = category
+
+def stage_bet(user, question_id, option_id, amount):
+    """Checks a bet against the current state and adds it to the session, uncommitted."""
+    question = db.session.get(Question, question_id)
+    if question is None:
+        raise BetRejected('Question not found', 404, 'danger')
+    if not question.is_open:
+        raise BetRejected('Betting for this question is now closed', 403)
+    if user.points < amount:
+        raise BetRejected('You do not have enough points for this bet', 402, 'danger')
+    if Bet.query.filter_by(user_roll_number=user.roll_number, question_id=question_id).first():
+        raise BetRejected('You have already placed a bet on this question', 409)
+
+    user.points -= amount
+    new_bet = Bet(user_roll_number=user.roll_number, question_id=question_id, option_id=option_id, amount=amount)
+    db.session.add(new_bet)
+    return new_bet
+
+def record_bet(user, question_id, option_id, amount):
+    """Places a bet durably and returns the user's new points; raises BetRejected.
+
+    Returns only after the bet is committed, in either ingestion mode.
+    """
+    if current_app.config['BET_INGEST_MODE'] == 'batched':
+        try:
+            return current_app.extensions['bet_ingest'].submit((user.roll_number, question_id, option_id, amount))
+        except QueueTimeout:
+            raise BetRejected('The server is busy and your bet was not placed. Please try again', 503, 'danger')
+    stage_bet(user, question_id, option_id, amount)
+    db.session.commit()
+    return user.points
+
+def commit_bet_batch(app, payloads):
+    """Runs on the bet writer thread: validates a batch and commits it as one transaction."""
+    outcomes = []
+    with app.app_context():
+        for roll_number, question_id, option_id, amount in payloads:
+            user = db.session.get(User, roll_number)
+            try:
+                if user is None:
+                    raise BetRejected('User not found', 401, 'danger')
+                stage_bet(user, question_id, option_id, amount)
+                outcomes.append(user.points)
+            except BetRejected as rejection:
+                outcomes.append(rejection)
+        db.session.commit()
+    return outcomes
+
 def get_ranked_leaderboard():
     """Queries players and calculates their rank, handling ties."""
     players = User.query.filter(User.bets.any(), User.is_admin == False).order_by(db.desc(User.points)).all()
-    
+    return rank_players(players)
+
+def rank_players(players):
+    """Assigns competition ranks to players already sorted by points, descending."""
     ranked_players = []
     last_score = -1
     last_rank = 0
@@ -214,58 +499,61 @@ def get_ranked_leaderboard():
             
     return ranked_players
 
-@app.cli.command("init-db")
+@bp.cli.command("init-db")
 def init_db_command():
-    with app.app_context():
-        db.create_all()
-        if not User.query.filter_by(roll_number='admin').first():
-            admin_user = User(roll_number='admin', name='Admin User', is_admin=True)
-            admin_user.password = 'password'
-            db.session.add(admin_user)
-            db.session.commit()
-            print("Database initialized and admin user 'admin' created.")
-        
-        teams = ['Alpha Wolves', 'Black Pirates', 'Dragon Slayers', 'Viking Warriors']
-        for team_name in teams:
-            if not Team.query.filter_by(name=team_name).first():
-                team = Team(name=team_name, squad="Player 1, Player 2, Player 3...")
-                db.session.add(team)
+    db.create_all()
+    if not User.query.filter_by(roll_number='admin').first():
+        admin_user = User(roll_number='admin', name='Admin User', is_admin=True)
+        admin_user.password = 'password'
+        db.session.add(admin_user)
         db.session.commit()
-        print("Teams have been populated.")
+        print("Database initialized and admin user 'admin' created.")
+    
+    teams = ['Alpha Wolves', 'Black Pirates', 'Dragon Slayers', 'Viking Warriors']
+    for team_name in teams:
+        if not Team.query.filter_by(name=team_name).first():
+            team = Team(name=team_name, squad="Player 1, Player 2, Player 3...")
+            db.session.add(team)
+    db.session.commit()
+    print("Teams have been populated.")
 
 
 # --- CORE & USER ROUTES ---
-@app.route('/')
+@bp.route('/')
 def index():
     if get_current_user():
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     return render_template('index.html')
 
-@app.route('/leaderboard')
+@bp.route('/leaderboard')
 def leaderboard():
     user = get_current_user()
-    ranked_players = get_ranked_leaderboard()
-    return render_template('leaderboard.html', user=user, players=ranked_players)
+    leaderboard_table = render_fragment('fragments/leaderboard_table.html', ['users', 'bets'],
+                                        context=lambda: {'players': get_ranked_leaderboard()})
+    return render_template('leaderboard.html', user=user, leaderboard_table=leaderboard_table)
 
-@app.route('/login', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         roll_number = request.form['roll_number']
         password = request.form['password']
         roll_number = roll_number.replace('/', '')
+        limited = check_rate_limit('login', roll_number)
+        if limited:
+            return limited
         user = User.query.get(roll_number)
 
         if user and user.verify_password(password):
             session['roll_number'] = user.roll_number
             flash('Login successful!', 'success')
             if user.is_admin:
-                return redirect(url_for('admin_dashboard'))
-            return redirect(url_for('dashboard'))
+                return redirect(url_for('main.admin_dashboard'))
+            return redirect(url_for('main.dashboard'))
         else:
             flash('Invalid roll number or password.', 'danger')
     return render_template('login.html')
 
-@app.route('/register', methods=['GET', 'POST'])
+@bp.route('/register', methods=['GET', 'POST'])
 def register():
     if request.method == 'POST':
         name = request.form['name']
@@ -275,7 +563,7 @@ def register():
         
         if User.query.get(roll_number):
             flash('This roll number is already registered.', 'warning')
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
 
         new_user = User(name=name, roll_number=roll_number)
         new_user.password = password
@@ -283,21 +571,21 @@ def register():
         db.session.commit()
         
         flash('Registration successful! Please log in.', 'success')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
         
     return render_template('register.html')
 
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     session.pop('roll_number', None)
     flash('You have been logged out.', 'info')
-    return redirect(url_for('login'))
+    return redirect(url_for('main.login'))
 
-@app.route('/change-password', methods=['GET', 'POST'])
+@bp.route('/change-password', methods=['GET', 'POST'])
 def change_password():
     user = get_current_user()
     if not user:
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
 
     if request.method == 'POST':
         current_password = request.form['current_password']
@@ -306,24 +594,24 @@ def change_password():
 
         if not user.verify_password(current_password):
             flash('Your current password is incorrect.', 'danger')
-            return redirect(url_for('change_password'))
+            return redirect(url_for('main.change_password'))
         
         if new_password != confirm_password:
             flash('New passwords do not match.', 'danger')
-            return redirect(url_for('change_password'))
+            return redirect(url_for('main.change_password'))
         
         user.password = new_password
         db.session.commit()
         flash('Your password has been updated successfully!', 'success')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
 
     return render_template('change_password.html', user=user)
 
-@app.route('/dashboard')
+@bp.route('/dashboard')
 def dashboard():
     user = get_current_user()
     if not user:
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     
     active_events = Event.query.filter_by(is_active=True).all()
     user_bets_q_ids = [bet.question_id for bet in user.bets]
@@ -340,70 +628,66 @@ def dashboard():
 
     return render_template('dashboard.html', user=user, available_questions=available_questions)
 
-@app.route('/place_bet/<int:question_id>', methods=['POST'])
+@bp.route('/place_bet/<int:question_id>', methods=['POST'])
 def place_bet(question_id):
     user = get_current_user()
     if not user:
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
+    limited = check_rate_limit('bet', user.roll_number)
+    if limited:
+        return limited
     question = Question.query.get_or_404(question_id)
     if not question.is_open:
         flash("Betting for this question is now closed.", "warning")
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
 
     try:
         amount = int(request.form['amount'])
         option_id = int(request.form['option_id'])
     except (ValueError, KeyError):
         flash("Invalid bet data submitted.", "danger")
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
 
     if amount <= 0:
         flash("Bet amount must be positive.", "warning")
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
 
-    if user.points < amount:
-        flash("You do not have enough points for this bet.", "danger")
-        return redirect(url_for('dashboard'))
-
-    existing_bet = Bet.query.filter_by(user_roll_number=user.roll_number, question_id=question_id).first()
-    if existing_bet:
-        flash("You have already placed a bet on this question.", "warning")
-        return redirect(url_for('dashboard'))
-
-    user.points -= amount
-    new_bet = Bet(user_roll_number=user.roll_number, question_id=question_id, option_id=option_id, amount=amount)
-    db.session.add(new_bet)
-    db.session.commit()
+    try:
+        record_bet(user, question_id, option_id, amount)
+    except BetRejected as rejection:
+        flash(f"{rejection.message}.", rejection.category)
+        return redirect(url_for('main.dashboard'))
 
     flash(f"Bet of {amount} points placed successfully!", "success")
-    return redirect(url_for('dashboard'))
+    return redirect(url_for('main.dashboard'))
 
-@app.route('/my_bets')
+@bp.route('/my_bets')
 def my_bets():
     user = get_current_user()
     if not user:
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     
     bets = Bet.query.filter_by(user_roll_number=user.roll_number).order_by(Bet.timestamp.desc()).all()
     return render_template('my_bets.html', user=user, bets=bets)
 
-@app.route('/squads')
+@bp.route('/squads')
 def squads():
     user = get_current_user()
     if not user:
-        return redirect(url_for('login'))
-    teams = Team.query.all()
-    return render_template('squads.html', teams=teams, user=user)
+        return redirect(url_for('main.login'))
+    squads_grid = render_fragment('fragments/squads_grid.html', ['teams'],
+                                  context=lambda: {'teams': Team.query.all()})
+    return render_template('squads.html', squads_grid=squads_grid, user=user)
 
 # --- ADMIN PANEL ---
-@app.route('/admin')
+@bp.route('/admin')
 @admin_required
 def admin_dashboard():
     user = get_current_user()
     all_events = Event.query.order_by(Event.name).all()
     return render_template('admin/dashboard.html', user=user, events=all_events)
 
-@app.route('/admin/reset_user', methods=['POST'])
+@bp.route('/admin/reset_user', methods=['POST'])
 @admin_required
 def reset_user():
     roll_number = request.form.get('roll_number_to_reset')
@@ -411,16 +695,16 @@ def reset_user():
 
     if not user_to_reset:
         flash(f"User with roll number '{roll_number}' not found.", 'danger')
-        return redirect(url_for('admin_dashboard'))
+        return redirect(url_for('main.admin_dashboard'))
     
     user_to_reset.password = 'password'
     
     db.session.commit()
 
     flash(f"Account for {user_to_reset.name} ({user_to_reset.roll_number}) has been reset. New password is 'password'.", 'success')
-    return redirect(url_for('admin_dashboard'))
+    return redirect(url_for('main.admin_dashboard'))
 
-@app.route('/admin/events/create', methods=['POST'])
+@bp.route('/admin/events/create', methods=['POST'])
 @admin_required
 def create_event():
     name = request.form.get('name')
@@ -431,18 +715,18 @@ def create_event():
         flash(f'Event "{name}" created successfully.', 'success')
     else:
         flash('Event name is required and must be unique.', 'danger')
-    return redirect(url_for('admin_dashboard'))
+    return redirect(url_for('main.admin_dashboard'))
 
-@app.route('/admin/events/delete/<int:event_id>', methods=['POST'])
+@bp.route('/admin/events/delete/<int:event_id>', methods=['POST'])
 @admin_required
 def delete_event(event_id):
     event_to_delete = Event.query.get_or_404(event_id)
     db.session.delete(event_to_delete)
     db.session.commit()
     flash(f'Event "{event_to_delete.name}" and all its data have been permanently deleted.', 'success')
-    return redirect(url_for('admin_dashboard'))
+    return redirect(url_for('main.admin_dashboard'))
 
-@app.route('/admin/events/toggle/<int:event_id>')
+@bp.route('/admin/events/toggle/<int:event_id>')
 @admin_required
 def toggle_event_status(event_id):
     event = Event.query.get_or_404(event_id)
@@ -450,16 +734,16 @@ def toggle_event_status(event_id):
     db.session.commit()
     status = "activated" if event.is_active else "deactivated"
     flash(f'Event "{event.name}" has been {status}.', 'info')
-    return redirect(url_for('admin_dashboard'))
+    return redirect(url_for('main.admin_dashboard'))
 
-@app.route('/admin/questions/<int:event_id>')
+@bp.route('/admin/questions/<int:event_id>')
 @admin_required
 def manage_questions(event_id):
     user = get_current_user()
     event = Event.query.get_or_404(event_id)
     return render_template('admin/questions.html', user=user, event=event)
     
-@app.route('/admin/questions/create/<int:event_id>', methods=['POST'])
+@bp.route('/admin/questions/create/<int:event_id>', methods=['POST'])
 @admin_required
 def create_question(event_id):
     event = Event.query.get_or_404(event_id)
@@ -467,7 +751,7 @@ def create_question(event_id):
 
     if not question_text:
         flash('Question text cannot be empty.', 'danger')
-        return redirect(url_for('manage_questions', event_id=event.id))
+        return redirect(url_for('main.manage_questions', event_id=event.id))
 
     option_texts = request.form.getlist('option_text')
     option_odds_list = request.form.getlist('option_odds')
@@ -475,7 +759,7 @@ def create_question(event_id):
     valid_options_provided = any(text and odds for text, odds in zip(option_texts, option_odds_list))
     if not valid_options_provided:
         flash('You must provide at least one complete option (text and odds).', 'danger')
-        return redirect(url_for('manage_questions', event_id=event.id))
+        return redirect(url_for('main.manage_questions', event_id=event.id))
 
     new_question = Question(text=question_text, event_id=event.id)
     db.session.add(new_question)
@@ -498,14 +782,14 @@ def create_question(event_id):
     if options_added_count < 2:
         db.session.rollback() 
         flash('A question requires at least two valid options. The question was not created.', 'danger')
-        return redirect(url_for('manage_questions', event_id=event.id))
+        return redirect(url_for('main.manage_questions', event_id=event.id))
 
     db.session.commit()
     flash(f'New question with {options_added_count} option(s) has been added.', 'success')
-    return redirect(url_for('manage_questions', event_id=event.id))
+    return redirect(url_for('main.manage_questions', event_id=event.id))
 
 # ** NEW: Route to delete a question **
-@app.route('/admin/questions/delete/<int:question_id>', methods=['POST'])
+@bp.route('/admin/questions/delete/<int:question_id>', methods=['POST'])
 @admin_required
 def delete_question(question_id):
     question = Question.query.get_or_404(question_id)
@@ -516,10 +800,10 @@ def delete_question(question_id):
     db.session.commit()
 
     flash(f'Question "{question_text[:30]}..." and all associated data have been permanently deleted.', 'success')
-    return redirect(url_for('manage_questions', event_id=event_id))
+    return redirect(url_for('main.manage_questions', event_id=event_id))
 
 
-@app.route('/admin/questions/toggle/<int:question_id>')
+@bp.route('/admin/questions/toggle/<int:question_id>')
 @admin_required
 def toggle_question_status(question_id):
     question = Question.query.get_or_404(question_id)
@@ -527,9 +811,9 @@ def toggle_question_status(question_id):
     db.session.commit()
     status = "opened for betting" if question.is_open else "closed for betting"
     flash(f'Question "{question.text[:30]}..." has been {status}.', 'info')
-    return redirect(url_for('manage_questions', event_id=question.event_id))
+    return redirect(url_for('main.manage_questions', event_id=question.event_id))
 
-@app.route('/admin/squads', methods=['GET', 'POST'])
+@bp.route('/admin/squads', methods=['GET', 'POST'])
 @admin_required
 def manage_squads():
     user = get_current_user()
@@ -541,19 +825,19 @@ def manage_squads():
             team.squad = squad_text
             db.session.commit()
             flash(f"Squad for {team.name} updated.", "success")
-        return redirect(url_for('manage_squads'))
+        return redirect(url_for('main.manage_squads'))
 
     teams = Team.query.all()
     return render_template('admin/squads.html', user=user, teams=teams)
 
-@app.route('/admin/results')
+@bp.route('/admin/results')
 @admin_required
 def manage_results():
     user = get_current_user()
     unresolved_questions = Question.query.filter_by(is_open=False, winning_option_id=None).all()
     return render_template('admin/results.html', user=user, questions=unresolved_questions)
 
-@app.route('/admin/results/process/<int:question_id>', methods=['POST'])
+@bp.route('/admin/results/process/<int:question_id>', methods=['POST'])
 @admin_required
 def process_results(question_id):
     question = Question.query.get_or_404(question_id)
@@ -561,7 +845,7 @@ def process_results(question_id):
 
     if not winning_option_id:
         flash('You must select a winning option.', 'danger')
-        return redirect(url_for('manage_results'))
+        return redirect(url_for('main.manage_results'))
 
     question.winning_option_id = int(winning_option_id)
     winning_option = Option.query.get(question.winning_option_id)
@@ -579,16 +863,115 @@ def process_results(question_id):
     
     db.session.commit()
     flash(f'Results for question "{question.text[:30]}..." processed. {len(bets_to_process)} bets updated.', 'success')
-    return redirect(url_for('manage_results'))
+    return redirect(url_for('main.manage_results'))
+
+
+@bp.route('/admin/analytics/<int:event_id>')
+@admin_required
+def event_analytics(event_id):
+    user = get_current_user()
+    event = Event.query.get_or_404(event_id)
+    return render_template('admin/analytics.html', user=user, event=event, stats=get_event_analytics(event.id))
+
+@bp.route('/admin/analytics/<int:event_id>/data')
+@admin_required
+def event_analytics_data(event_id):
+    event = Event.query.get_or_404(event_id)
+    return jsonify(get_event_analytics(event.id))
+
+
+@bp.route('/admin/metrics')
+@admin_required
+def metrics():
+    return jsonify({
+        'rate_limiter': current_app.extensions['rate_limiter'].stats(),
+        'fragment_cache': current_app.extensions['fragment_cache'].stats(),
+        'bet_ingest': dict(current_app.extensions['bet_ingest'].stats(),
+                           mode=current_app.config['BET_INGEST_MODE']),
+    })
 
 
 # --- ADMIN DOWNLOAD ROUTES (Unchanged) ---
-@app.route('/admin/download_bets')
+def build_bets_sheet(event):
+    """Computes one event's export sheet: headers and a row per bettor.
+
+    Rows stop before the "Final Score" column. Points change whenever the user
+    bets anywhere, so download_bets fills that column in fresh on every export
+    and the rest of the sheet can be cached until this event changes.
+    """
+    questions = db.session.execute(
+        db.select(Question.id, Question.text, WinningOption.text)
+        .outerjoin(WinningOption, Question.winning_option_id == WinningOption.id)
+        .where(Question.event_id == event.id)
+        .order_by(Question.id)
+    ).all()
+    headers = ["Timestamp", "Roll Number", "Name"]
+    for q_id, q_text, _ in questions:
+        headers.extend([
+            f"Q{q_id}: {q_text}", "Selected Option", "Correct Answer", 
+            "Bet Amount", "Odds"
+        ])
+    headers.extend(["Total Won/Lost in Event", "Final Score"])
+
+    bets_in_event = db.session.execute(
+        db.select(Bet.user_roll_number, Bet.question_id, Bet.timestamp, Bet.amount, Bet.status,
+                  User.name, Option.text, Option.odds)
+        .join(Question, Bet.question_id == Question.id)
+        .join(User, Bet.user_roll_number == User.roll_number)
+        .join(Option, Bet.option_id == Option.id)
+        .where(Question.event_id == event.id)
+        .order_by(Bet.id)
+    ).all()
+    user_event_data = {}
+    for bet in bets_in_event:
+        roll_number = bet.user_roll_number
+        if roll_number not in user_event_data:
+            user_event_data[roll_number] = {
+                'name': bet.name, 'timestamp': bet.timestamp.strftime("%Y-%m-%d %H:%M"),
+                'bets': {}
+            }
+        user_event_data[roll_number]['bets'][bet.question_id] = bet
+
+    rows = []
+    for roll_number, data in user_event_data.items():
+        total_won_lost = 0
+        row_data = [data['timestamp'], roll_number, data['name']]
+        for q_id, _, winning_text in questions:
+            bet = data['bets'].get(q_id)
+            if bet:
+                if bet.status == 'Won':
+                    total_won_lost += (bet.amount * bet.odds) - bet.amount
+                elif bet.status == 'Lost':
+                    total_won_lost -= bet.amount
+                row_data.extend(["", bet.text, winning_text or "Pending", bet.amount, bet.odds])
+            else:
+                row_data.extend(["", "No Bet", "N/A", "", ""])
+        row_data.append(int(total_won_lost))
+        rows.append(row_data)
+    return {'title': event.name, 'question_count': len(questions), 'headers': headers, 'rows': rows}
+
+@bp.route('/admin/download_bets')
 @admin_required
 def download_bets():
-    wb = Workbook()
-    wb.remove(wb.active)
+    # openpyxl is only needed by the two export routes, so it is imported on
+    # first use rather than by every worker at startup.
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import PatternFill
+
     events = Event.query.order_by(Event.id).all()
+    versions = get_data_versions([event_scope(event.id) for event in events])
+    sheet_cache = SheetCache(current_app.config['EXPORT_CACHE_DIR'])
+    sheets, rebuilt = [], 0
+    for event, version in zip(events, versions):
+        sheet = sheet_cache.get(event.id, version)
+        if sheet is None:
+            sheet = sheet_cache.set(event.id, version, build_bets_sheet(event))
+            rebuilt += 1
+        sheets.append(sheet)
+    sheet_cache.prune(event.id for event in events)
+    current_app.logger.info("Bets export: rebuilt %d of %d event sheets.", rebuilt, len(events))
+
     color_palette = [
         PatternFill(start_color="DDEBF7", end_color="DDEBF7", fill_type="solid"),
         PatternFill(start_color="E2EFDA", end_color="E2EFDA", fill_type="solid"),
@@ -597,59 +980,24 @@ def download_bets():
     ]
     static_header_fill = PatternFill(start_color="BFBFBF", end_color="BFBFBF", fill_type="solid")
     summary_header_fill = PatternFill(start_color="A6A6A6", end_color="A6A6A6", fill_type="solid")
-    for event in events:
-        ws = wb.create_sheet(title=event.name)
-        questions = sorted(event.questions, key=lambda q: q.id)
-        headers = ["Timestamp", "Roll Number", "Name"]
-        for q in questions:
-            headers.extend([
-                f"Q{q.id}: {q.text}", "Selected Option", "Correct Answer", 
-                "Bet Amount", "Odds"
-            ])
-        headers.extend(["Total Won/Lost in Event", "Final Score"])
-        ws.append(headers)
-        header_row = ws[1]
-        for i in range(1, 4):
-            header_row[i-1].fill = static_header_fill
-        current_col = 4
-        for i, q in enumerate(questions):
-            color = color_palette[i % len(color_palette)]
-            for _ in range(5):
-                header_row[current_col-1].fill = color
-                current_col += 1
-        header_row[current_col-1].fill = summary_header_fill
-        header_row[current_col].fill = summary_header_fill
-        bets_in_event = Bet.query.join(Question).filter(Question.event_id == event.id).all()
-        user_event_data = {}
-        for bet in bets_in_event:
-            roll_number = bet.user_roll_number
-            if roll_number not in user_event_data:
-                user_event_data[roll_number] = {
-                    'user': bet.bettor, 'timestamp': bet.timestamp.strftime("%Y-%m-%d %H:%M"),
-                    'bets': {}
-                }
-            user_event_data[roll_number]['bets'][bet.question_id] = bet
-        for roll_number, data in user_event_data.items():
-            user = data['user']
-            total_won_lost = 0
-            row_data = [data['timestamp'], user.roll_number, user.name]
-            for q in questions:
-                bet = data['bets'].get(q.id)
-                if bet:
-                    if bet.status == 'Won':
-                        total_won_lost += (bet.amount * bet.option.odds) - bet.amount
-                    elif bet.status == 'Lost':
-                        total_won_lost -= bet.amount
-                    row_data.extend([
-                        "", bet.option.text,
-                        bet.question.winning_option.text if bet.question.winning_option else "Pending",
-                        bet.amount, bet.option.odds
-                    ])
-                else:
-                    row_data.extend(["", "No Bet", "N/A", "", ""])
-            row_data.append(int(total_won_lost))
-            row_data.append(user.points)
-            ws.append(row_data)
+    header_fills = [static_header_fill] * 3
+    points = dict(db.session.execute(db.select(User.roll_number, User.points)).all())
+
+    # Write-only mode streams rows straight to the file instead of building a cell grid.
+    wb = Workbook(write_only=True)
+    for sheet in sheets:
+        ws = wb.create_sheet(title=sheet['title'])
+        fills = header_fills + [color_palette[i % len(color_palette)]
+                                for i in range(sheet['question_count']) for _ in range(5)]
+        fills += [summary_header_fill] * 2
+        header_row = []
+        for header, fill in zip(sheet['headers'], fills):
+            cell = WriteOnlyCell(ws, value=header)
+            cell.fill = fill
+            header_row.append(cell)
+        ws.append(header_row)
+        for row_data in sheet['rows']:
+            ws.append(row_data + [points.get(row_data[1])])
     excel_io = BytesIO()
     wb.save(excel_io)
     excel_io.seek(0)
@@ -660,9 +1008,12 @@ def download_bets():
         download_name=f'stratabet_bets_export_{datetime.now().strftime("%Y%m%d")}.xlsx'
     )
 
-@app.route('/admin/download_results')
+@bp.route('/admin/download_results')
 @admin_required
 def download_results():
+    from openpyxl import Workbook
+    from openpyxl.styles import PatternFill
+
     ranked_players = get_ranked_leaderboard()
     
     wb = Workbook()
@@ -690,7 +1041,7 @@ def download_results():
     )
 #! Android APIs
 
-@app.route('/api/register', methods=['POST'])
+@bp.route('/api/register', methods=['POST'])
 def api_register():
     data = request.get_json()
     if not data or not all(k in data for k in ('name', 'roll_number', 'password')):
@@ -708,13 +1059,16 @@ def api_register():
     return jsonify({'message': 'Registration successful! Please log in.'}), 201
 
 
-@app.route('/api/login', methods=['POST'])
+@bp.route('/api/login', methods=['POST'])
 def api_login():
     data = request.get_json()
     if not data or not all(k in data for k in ('roll_number', 'password')):
         return make_response('Could not verify', 401, {'WWW-Authenticate': 'Basic realm="Login required!"'})
 
     roll_number = data['roll_number'].replace('/', '')
+    limited = check_rate_limit('login', roll_number)
+    if limited:
+        return limited
     user = User.query.get(roll_number)
 
     if not user or not user.verify_password(data['password']):
@@ -723,12 +1077,12 @@ def api_login():
     token = jwt.encode({
         'roll_number': user.roll_number,
         'exp': datetime.utcnow() + timedelta(days=30) # Token valid for 30 days
-    }, app.config['JWT_SECRET_KEY'], algorithm="HS256")
+    }, current_app.config['JWT_SECRET_KEY'], algorithm="HS256")
 
     return jsonify({'token': token, 'user': user.to_dict()})
 
 
-@app.route('/api/dashboard', methods=['GET'])
+@bp.route('/api/dashboard', methods=['GET'])
 @token_required
 def api_dashboard(current_user):
     active_events = Event.query.filter_by(is_active=True).all()
@@ -747,9 +1101,12 @@ def api_dashboard(current_user):
 
     return jsonify(available_questions_list)
 
-@app.route('/api/bets/place/<int:question_id>', methods=['POST'])
+@bp.route('/api/bets/place/<int:question_id>', methods=['POST'])
 @token_required
 def api_place_bet(current_user, question_id):
+    limited = check_rate_limit('bet', current_user.roll_number)
+    if limited:
+        return limited
     data = request.get_json()
     if not data or not all(k in data for k in ('amount', 'option_id')):
         return jsonify({'message': 'Missing amount or option_id'}), 400
@@ -767,28 +1124,22 @@ def api_place_bet(current_user, question_id):
     if amount <= 0:
         return jsonify({'message': 'Bet amount must be positive'}), 400
 
-    if current_user.points < amount:
-        return jsonify({'message': 'You do not have enough points for this bet'}), 402
-
-    if Bet.query.filter_by(user_roll_number=current_user.roll_number, question_id=question_id).first():
-        return jsonify({'message': 'You have already placed a bet on this question'}), 409
-
-    current_user.points -= amount
-    new_bet = Bet(user_roll_number=current_user.roll_number, question_id=question_id, option_id=option_id, amount=amount)
-    db.session.add(new_bet)
-    db.session.commit()
+    try:
+        new_points = record_bet(current_user, question_id, option_id, amount)
+    except BetRejected as rejection:
+        return jsonify({'message': rejection.message}), rejection.status
 
-    return jsonify({'message': f'Bet of {amount} points placed successfully!', 'new_points': current_user.points}), 201
+    return jsonify({'message': f'Bet of {amount} points placed successfully!', 'new_points': new_points}), 201
 
 
-@app.route('/api/my-bets', methods=['GET'])
+@bp.route('/api/my-bets', methods=['GET'])
 @token_required
 def api_my_bets(current_user):
     bets = Bet.query.filter_by(user_roll_number=current_user.roll_number).order_by(Bet.timestamp.desc()).all()
     return jsonify([bet.to_dict() for bet in bets])
 
 
-@app.route('/api/leaderboard', methods=['GET'])
+@bp.route('/api/leaderboard', methods=['GET'])
 def api_leaderboard():
     ranked_players = get_ranked_leaderboard()
     
@@ -802,7 +1153,7 @@ def api_leaderboard():
         
     return jsonify(leaderboard_data)
 
-@app.route('/api/squads', methods=['GET'])
+@bp.route('/api/squads', methods=['GET'])
 @token_required
 def api_squads(current_user):
     teams = Team.query.all()
@@ -810,4 +1161,4 @@ def api_squads(current_user):
 
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    create_app().run(debug=True)
\ No newline at end of file
@@ -0,0 +1,282 @@
+"""Async serving mode for the Android API.
+
+The Flask views in app.py run under gunicorn sync workers, so every mobile
+client waiting on a response pins a whole worker. This module serves the same
+``/api/*`` endpoints as a small Starlette app on top of an async SQLAlchemy
+engine (aiosqlite locally, asyncpg in production). It reuses the models from
+app.py and returns the same JSON bodies and status codes, so the Android
+client can be pointed at either one.
+
+Run it next to the regular app, e.g.::
+
+    gunicorn -c gunicorn.conf.py
+    uvicorn asgi_api:app --host 0.0.0.0 --port 8001
+
+and compare the two with ``benchmarks/api_concurrency.py``.
+"""
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+import jwt
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import joinedload, selectinload
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from app import create_app, db, User, Event, Question, Bet, Team, rank_players
+
+# Async drivers to swap in for the sync ones configured on the Flask app.
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+
+def async_database_url(url):
+    """Converts a sync SQLAlchemy URL into the equivalent async driver URL."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend '{backend}'.")
+    url = url.set(drivername=ASYNC_DRIVERS[backend])
+    if backend == 'postgresql':
+        # asyncpg spells libpq's sslmode as ssl and has no channel_binding option.
+        query = dict(url.query)
+        if 'sslmode' in query:
+            query['ssl'] = query.pop('sslmode')
+        query.pop('channel_binding', None)
+        url = url.set(query=query)
+    return url
+
+
+def message(text, status_code, headers=None):
+    return JSONResponse({'message': text}, status_code=status_code, headers=headers)
+
+
+async def authenticate(request, session):
+    """Async counterpart of ``token_required``: returns (user, error_response)."""
+    auth_header = request.headers.get('Authorization', '')
+    parts = auth_header.split(" ")
+    token = parts[1] if len(parts) > 1 else None
+    if not token:
+        return None, message('Token is missing!', 401)
+    try:
+        data = jwt.decode(token, request.app.state.jwt_secret_key, algorithms=["HS256"])
+    except jwt.ExpiredSignatureError:
+        return None, message('Token has expired!', 401)
+    except jwt.InvalidTokenError:
+        return None, message('Token is invalid!', 401)
+
+    user = await session.get(User, data['roll_number'])
+    if not user:
+        return None, message('User not found!', 401)
+    return user, None
+
+
+async def check_rate_limit(request, name, roll_number=None):
+    """Async counterpart of app.check_rate_limit, sharing the Flask app's limiter and buckets."""
+    limiter = request.app.state.rate_limiter
+    client_ip = request.client.host if request.client else None
+    # The SQLite bucket store does blocking I/O, so stay off the event loop.
+    retry_after = await run_in_threadpool(limiter.check, name, [('ip', client_ip), ('user', roll_number)])
+    if retry_after is None:
+        return None
+    return message(f'Too many requests. Please try again in {retry_after} seconds.', 429,
+                   headers={'Retry-After': str(retry_after)})
+
+
+async def read_json(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+async def api_register(request):
+    data = await read_json(request)
+    if not data or not all(k in data for k in ('name', 'roll_number', 'password')):
+        return message('Missing data', 400)
+
+    roll_number = data['roll_number'].replace('/', '')
+    async with request.app.state.sessionmaker() as session:
+        if await session.get(User, roll_number):
+            return message('This roll number is already registered', 409)
+
+        new_user = User(name=data['name'], roll_number=roll_number)
+        # bcrypt is deliberately CPU heavy, keep it off the event loop.
+        await run_in_threadpool(setattr, new_user, 'password', data['password'])
+        session.add(new_user)
+        await session.commit()
+
+    return message('Registration successful! Please log in.', 201)
+
+
+async def api_login(request):
+    data = await read_json(request)
+    if not data or not all(k in data for k in ('roll_number', 'password')):
+        return Response('Could not verify', 401, {'WWW-Authenticate': 'Basic realm="Login required!"'})
+
+    roll_number = data['roll_number'].replace('/', '')
+    limited = await check_rate_limit(request, 'login', roll_number)
+    if limited:
+        return limited
+    async with request.app.state.sessionmaker() as session:
+        user = await session.get(User, roll_number)
+
+    if not user or not await run_in_threadpool(user.verify_password, data['password']):
+        return message('Invalid roll number or password', 401)
+
+    token = jwt.encode({
+        'roll_number': user.roll_number,
+        'exp': datetime.utcnow() + timedelta(days=30)
+    }, request.app.state.jwt_secret_key, algorithm="HS256")
+
+    return JSONResponse({'token': token, 'user': user.to_dict()})
+
+
+async def api_dashboard(request):
+    async with request.app.state.sessionmaker() as session:
+        current_user, error = await authenticate(request, session)
+        if error:
+            return error
+
+        user_bets_q_ids = select(Bet.question_id).where(Bet.user_roll_number == current_user.roll_number)
+        questions = await session.scalars(
+            select(Question)
+            .join(Event)
+            .where(Event.is_active == True,
+                   Question.is_open == True,
+                   Question.id.notin_(user_bets_q_ids))
+            .order_by(Event.id, Question.id)
+            .options(joinedload(Question.event), selectinload(Question.options))
+        )
+        return JSONResponse([q.to_dict() for q in questions])
+
+
+async def api_place_bet(request):
+    question_id = request.path_params['question_id']
+    data = await read_json(request)
+
+    async with request.app.state.sessionmaker() as session:
+        current_user, error = await authenticate(request, session)
+        if error:
+            return error
+        limited = await check_rate_limit(request, 'bet', current_user.roll_number)
+        if limited:
+            return limited
+        if not data or not all(k in data for k in ('amount', 'option_id')):
+            return message('Missing amount or option_id', 400)
+
+        question = await session.get(Question, question_id)
+        if not question:
+            return message('Question not found', 404)
+        if not question.is_open:
+            return message('Betting for this question is now closed', 403)
+
+        try:
+            amount = int(data['amount'])
+            option_id = int(data['option_id'])
+        except (TypeError, ValueError):
+            return message('Invalid bet data submitted', 400)
+
+        if amount <= 0:
+            return message('Bet amount must be positive', 400)
+
+        if current_user.points < amount:
+            return message('You do not have enough points for this bet', 402)
+
+        existing_bet = await session.scalar(
+            select(Bet.id).where(Bet.user_roll_number == current_user.roll_number,
+                                 Bet.question_id == question_id).limit(1)
+        )
+        if existing_bet:
+            return message('You have already placed a bet on this question', 409)
+
+        current_user.points -= amount
+        session.add(Bet(user_roll_number=current_user.roll_number, question_id=question_id,
+                        option_id=option_id, amount=amount))
+        await session.commit()
+
+        return JSONResponse({'message': f'Bet of {amount} points placed successfully!',
+                             'new_points': current_user.points}, status_code=201)
+
+
+async def api_my_bets(request):
+    async with request.app.state.sessionmaker() as session:
+        current_user, error = await authenticate(request, session)
+        if error:
+            return error
+
+        bets = await session.scalars(
+            select(Bet)
+            .where(Bet.user_roll_number == current_user.roll_number)
+            .order_by(Bet.timestamp.desc())
+            .options(joinedload(Bet.question), joinedload(Bet.option))
+        )
+        return JSONResponse([bet.to_dict() for bet in bets])
+
+
+async def api_leaderboard(request):
+    async with request.app.state.sessionmaker() as session:
+        players = (await session.scalars(
+            select(User)
+            .where(User.bets.any(), User.is_admin == False)
+            .order_by(User.points.desc())
+        )).all()
+
+    return JSONResponse([{'rank': item['rank'], 'user': item['player'].to_dict()}
+                         for item in rank_players(players)])
+
+
+async def api_squads(request):
+    async with request.app.state.sessionmaker() as session:
+        current_user, error = await authenticate(request, session)
+        if error:
+            return error
+        teams = await session.scalars(select(Team))
+        return JSONResponse([team.to_dict() for team in teams])
+
+
+routes = [
+    Route('/api/register', api_register, methods=['POST']),
+    Route('/api/login', api_login, methods=['POST']),
+    Route('/api/dashboard', api_dashboard, methods=['GET']),
+    Route('/api/bets/place/{question_id:int}', api_place_bet, methods=['POST']),
+    Route('/api/my-bets', api_my_bets, methods=['GET']),
+    Route('/api/leaderboard', api_leaderboard, methods=['GET']),
+    Route('/api/squads', api_squads, methods=['GET']),
+]
+
+
+def create_asgi_app(config=None):
+    """Builds the async API app from the same configuration as ``create_app``."""
+    flask_app = create_app(config)
+    with flask_app.app_context():
+        database_url = db.engine.url
+    engine = create_async_engine(async_database_url(database_url), pool_pre_ping=True)
+
+    @asynccontextmanager
+    async def lifespan(asgi_app):
+        yield
+        await engine.dispose()
+
+    asgi_app = Starlette(
+        routes=routes,
+        middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'],
+                               allow_headers=['*'])],
+        lifespan=lifespan,
+    )
+    asgi_app.state.engine = engine
+    asgi_app.state.jwt_secret_key = flask_app.config['JWT_SECRET_KEY']
+    asgi_app.state.rate_limiter = flask_app.extensions['rate_limiter']
+    asgi_app.state.sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+    return asgi_app
+
+
+app = create_asgi_app()
@@ -0,0 +1,80 @@
+"""Concurrency benchmark for the mobile API.
+
+Opens many simultaneous clients against one API base URL and reports
+throughput and latency percentiles, so the sync (gunicorn) and async (uvicorn)
+serving modes can be compared side by side on the same box::
+
+    python benchmarks/api_concurrency.py http://127.0.0.1:8000 --clients 1000
+    python benchmarks/api_concurrency.py http://127.0.0.1:8001 --clients 1000
+
+Pass ``--token`` to benchmark an authenticated endpoint such as /api/dashboard.
+Only the standard library is used so the script runs anywhere the app does.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+async def fetch(host, port, path, headers):
+    reader, writer = await asyncio.open_connection(host, port)
+    request_lines = [f"GET {path} HTTP/1.1", f"Host: {host}", "Connection: close"]
+    request_lines.extend(f"{name}: {value}" for name, value in headers.items())
+    writer.write(("\r\n".join(request_lines) + "\r\n\r\n").encode())
+    await writer.drain()
+    status_line = await reader.readline()
+    await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    return int(status_line.split()[1])
+
+
+async def client(host, port, path, headers, requests_per_client, latencies, statuses):
+    for _ in range(requests_per_client):
+        started = time.perf_counter()
+        try:
+            status = await fetch(host, port, path, headers)
+        except OSError:
+            status = 'error'
+        latencies.append(time.perf_counter() - started)
+        statuses[status] = statuses.get(status, 0) + 1
+
+
+async def run(base_url, endpoint, clients, requests_per_client, token):
+    parts = urlsplit(base_url)
+    host, port = parts.hostname, parts.port or 80
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    latencies, statuses = [], {}
+
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        client(host, port, endpoint, headers, requests_per_client, latencies, statuses)
+        for _ in range(clients)
+    ))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    print(f"{base_url}{endpoint}: {clients} clients x {requests_per_client} requests")
+    print(f"  total time : {elapsed:.2f}s")
+    print(f"  throughput : {len(latencies) / elapsed:.1f} req/s")
+    print(f"  latency p50: {quantiles[49] * 1000:.1f} ms")
+    print(f"  latency p95: {quantiles[94] * 1000:.1f} ms")
+    print(f"  latency p99: {quantiles[98] * 1000:.1f} ms")
+    print(f"  statuses   : {statuses}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('base_url', help="e.g. http://127.0.0.1:8000")
+    parser.add_argument('--endpoint', default='/api/leaderboard')
+    parser.add_argument('--clients', type=int, default=200, help="concurrent connections")
+    parser.add_argument('--requests', type=int, default=5, help="requests per client")
+    parser.add_argument('--token', help="JWT from /api/login for authenticated endpoints")
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.endpoint, args.clients, args.requests, args.token))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Worker startup benchmark.
+
+Measures, in fresh interpreters, how long it takes to import app.py, build an
+app with ``create_app`` and serve the first request. These are the costs every
+new gunicorn worker pays without ``--preload`` (and the master pays once with
+it), so they bound how quickly we can add workers during a traffic spike::
+
+    python benchmarks/startup.py --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+flask_app = app.create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'TESTING': True})
+created = time.perf_counter()
+with flask_app.app_context():
+    app.db.create_all()
+response = flask_app.test_client().get(%r)
+served = time.perf_counter()
+print(json.dumps({
+    'import': imported - started,
+    'create_app': created - imported,
+    'first_request': served - created,
+    'status': response.status_code,
+    'openpyxl_loaded': 'openpyxl' in sys.modules,
+}))
+"""
+
+
+def measure(path):
+    output = subprocess.run([sys.executable, '-c', PROBE % path], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/leaderboard', help="URL of the first request")
+    args = parser.parse_args()
+
+    samples = [measure(args.path) for _ in range(args.runs)]
+    print(f"{args.runs} fresh interpreters, first request to {args.path} "
+          f"(status {samples[0]['status']})")
+    for phase in ('import', 'create_app', 'first_request'):
+        values = [s[phase] * 1000 for s in samples]
+        print(f"  {phase:<14} median {statistics.median(values):7.1f} ms   max {max(values):7.1f} ms")
+    totals = [(s['import'] + s['create_app'] + s['first_request']) * 1000 for s in samples]
+    print(f"  {'total':<14} median {statistics.median(totals):7.1f} ms")
+    print(f"  openpyxl imported at startup: {any(s['openpyxl_loaded'] for s in samples)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""Group commit for bet writes.
+
+Every bet placed the normal way is its own transaction and pays for its own
+fsync, and SQLite lets only one writer commit at a time. In batched mode,
+request threads hand their bet to a ``GroupCommitQueue`` instead. One writer
+thread per process drains the queue and commits up to ``max_batch_size`` bets,
+or whatever arrived within ``max_wait`` seconds, in a single transaction.
+
+Callers block until the batch holding their bet has committed, and only then
+receive their individual result. A response therefore never reports success
+for a bet that is not durable. A caller that times out before the writer picks
+its bet up withdraws it, so a bet that was reported as failed is never
+committed later either.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class QueueTimeout(Exception):
+    """The writer did not pick the item up in time; it was withdrawn and never committed."""
+
+
+class PendingItem:
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+        self._state = 'queued'
+        self._lock = threading.Lock()
+
+    def claim(self):
+        """Called by the writer; False if the caller already gave up on this item."""
+        with self._lock:
+            if self._state != 'queued':
+                return False
+            self._state = 'claimed'
+            return True
+
+    def withdraw(self):
+        """Called by the caller on timeout; False if the writer is already committing it."""
+        with self._lock:
+            if self._state != 'queued':
+                return False
+            self._state = 'withdrawn'
+            return True
+
+    def resolve(self, outcome):
+        if isinstance(outcome, BaseException):
+            self.error = outcome
+        else:
+            self.result = outcome
+        self.done.set()
+
+
+class GroupCommitQueue:
+    """Single-writer queue that commits submitted items in small batches.
+
+    ``commit_batch(payloads)`` runs on the writer thread. It must write and
+    commit the whole batch, returning one outcome per payload: either a result
+    or an exception instance for items it rejected. If it raises, every item
+    in the batch fails with that exception.
+    """
+
+    def __init__(self, commit_batch, max_batch_size=64, max_wait=0.005, timeout=5.0):
+        self.commit_batch = commit_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.Queue()
+        self._writer = None
+        self._writer_pid = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, payload):
+        """Queues ``payload`` and blocks until its batch commits; returns its result or raises its error."""
+        self._ensure_writer()
+        item = PendingItem(payload)
+        self._queue.put(item)
+        if not item.done.wait(self.timeout):
+            if item.withdraw():
+                raise QueueTimeout()
+            # The writer already holds the item, so its commit is under way.
+            item.done.wait()
+        if item.error is not None:
+            raise item.error
+        return item.result
+
+    def _ensure_writer(self):
+        # Started lazily, and again after a fork: threads do not survive
+        # into the children of a preloaded gunicorn master.
+        if self._writer is not None and self._writer_pid == os.getpid() and self._writer.is_alive():
+            return
+        with self._start_lock:
+            if self._writer is None or self._writer_pid != os.getpid() or not self._writer.is_alive():
+                if self._writer_pid != os.getpid():
+                    self._queue = queue.Queue()
+                self._writer = threading.Thread(target=self._run, name='bet-writer', daemon=True)
+                self._writer_pid = os.getpid()
+                self._writer.start()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = [item for item in self._next_batch() if item.claim()]
+            if not batch:
+                continue
+            try:
+                outcomes = self.commit_batch([item.payload for item in batch])
+            except Exception as exc:
+                logger.exception("Group commit of %d items failed.", len(batch))
+                outcomes = [exc] * len(batch)
+            self.batches += 1
+            self.items += len(batch)
+            for item, outcome in zip(batch, outcomes):
+                item.resolve(outcome)
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'average_batch_size': self.items / self.batches if self.batches else None,
+            'queued': self._queue.qsize(),
+        }
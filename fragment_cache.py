@@ -0,0 +1,76 @@
+"""In-process cache for rendered template fragments.
+
+Entries are keyed by whatever the caller considers the fragment's identity,
+normally the template name plus the version stamps of the data it shows (see
+``render_fragment`` in app.py). A new version produces a new key, so nothing
+is ever invalidated explicitly: stale entries simply stop being requested and
+fall off the end of the LRU once the cache reaches its size budget.
+"""
+import threading
+from collections import OrderedDict
+
+from markupsafe import Markup
+
+
+class FragmentCache:
+    """Thread-safe LRU of rendered HTML, bounded by the total size of its entries."""
+
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            html = self._entries.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return html
+
+    def set(self, key, html):
+        html = Markup(html)
+        size = len(html)
+        if size > self.max_bytes:
+            return html
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= len(previous)
+            self._entries[key] = html
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+        return html
+
+    def get_or_render(self, key, render):
+        """Returns the cached HTML for ``key``, calling ``render()`` to fill a miss."""
+        html = self.get(key)
+        if html is None:
+            # Rendering happens outside the lock; two threads racing on the
+            # same miss both render and the second write wins, which is harmless.
+            html = self.set(key, render())
+        return html
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
@@ -0,0 +1,18 @@
+# Gunicorn settings for production: `gunicorn -c gunicorn.conf.py`
+#
+# The app is imported once in the master (preload_app) so workers fork with
+# templates, models and extensions already loaded, which makes scaling up
+# workers during a traffic spike cheap. Database connections must not be
+# shared across processes, so each worker drops the pool it inherited.
+import os
+
+from app import dispose_engines
+
+wsgi_app = 'app:create_app()'
+preload_app = True
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+
+
+def post_fork(server, worker):
+    dispose_engines(worker.app.wsgi())
@@ -0,0 +1,146 @@
+"""Token-bucket rate limiting and a concurrency cap for admission control.
+
+Each named limit (e.g. 'login', 'bet') is a bucket of ``capacity`` tokens
+that refills at ``capacity / period`` tokens per second; every request takes
+one token per key (client IP, roll number) and is rejected when any of its
+buckets is empty. Buckets live in memory by default, which is per process;
+``SQLiteBucketStore`` keeps them in a local SQLite file instead so that all
+gunicorn workers on the box share one budget.
+"""
+import math
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+
+class MemoryBucketStore:
+    """Buckets held in this process only."""
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_rate, now):
+        """Takes a token from ``key``'s bucket; returns 0 on success or seconds until one is available."""
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                retry_after = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                retry_after = (1 - tokens) / refill_rate
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+            return retry_after
+
+    def _prune(self, now):
+        # A bucket that would have refilled completely carries no state worth keeping.
+        stale = [key for key, (tokens, updated) in self._buckets.items() if now - updated > 3600]
+        for key in stale:
+            del self._buckets[key]
+
+
+class SQLiteBucketStore:
+    """Buckets in a SQLite file, shared by every process on the machine."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS bucket '
+                               '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)')
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.connection = connection
+        return connection
+
+    def consume(self, key, capacity, refill_rate, now):
+        connection = self._connect()
+        # IMMEDIATE takes the write lock up front, so read-modify-write is atomic across processes.
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute('SELECT tokens, updated FROM bucket WHERE key = ?', (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            if tokens >= 1:
+                tokens -= 1
+                retry_after = 0.0
+            else:
+                retry_after = (1 - tokens) / refill_rate
+            connection.execute('INSERT INTO bucket (key, tokens, updated) VALUES (?, ?, ?) '
+                               'ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated',
+                               (key, tokens, now))
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return retry_after
+
+
+class RateLimiter:
+    """Named token-bucket limits plus a cap on requests in flight in this process.
+
+    ``limits`` maps a limit name to ``(capacity, period_seconds)``.
+    """
+
+    def __init__(self, limits, store=None, max_concurrent=None, clock=time.time):
+        self.limits = limits
+        self.store = store or MemoryBucketStore()
+        self.max_concurrent = max_concurrent
+        self.clock = clock
+        self.in_flight = 0
+        self.rejections = Counter()
+        self._slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+        self._lock = threading.Lock()
+
+    def check(self, name, keys):
+        """Consumes one token per key; returns whole seconds to wait if any bucket is empty, else None."""
+        if name not in self.limits:
+            return None
+        capacity, period = self.limits[name]
+        refill_rate = capacity / period
+        now = self.clock()
+        retry_after = 0.0
+        for kind, value in keys:
+            if value is None:
+                continue
+            wait = self.store.consume(f'{name}:{kind}:{value}', capacity, refill_rate, now)
+            if wait:
+                self.rejections[f'{name}:{kind}'] += 1
+                retry_after = max(retry_after, wait)
+        return math.ceil(retry_after) if retry_after else None
+
+    def acquire_slot(self):
+        """Claims a concurrency slot without waiting; False means the process is saturated."""
+        if self._slots is None:
+            return True
+        if not self._slots.acquire(blocking=False):
+            self.rejections['concurrency'] += 1
+            return False
+        with self._lock:
+            self.in_flight += 1
+        return True
+
+    def release_slot(self):
+        if self._slots is None:
+            return
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def stats(self):
+        return {
+            'limits': {name: {'capacity': capacity, 'period_seconds': period}
+                       for name, (capacity, period) in self.limits.items()},
+            'in_flight': self.in_flight,
+            'max_concurrent': self.max_concurrent,
+            'rejections': dict(self.rejections),
+        }
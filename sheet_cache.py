@@ -0,0 +1,47 @@
+"""On-disk cache of per-event export sheet data.
+
+Each event's sheet is stored as one JSON file, tagged with the event's data
+version at the time it was built. The bets export rebuilds only the events
+whose version has moved on and reuses every other sheet. Files live on disk
+rather than in memory so that all gunicorn workers, and restarts, share them.
+"""
+import json
+import os
+import tempfile
+
+
+class SheetCache:
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, event_id):
+        return os.path.join(self.directory, f'event_{event_id}.json')
+
+    def get(self, event_id, version):
+        """Returns the cached sheet for ``event_id`` if it was built at ``version``."""
+        try:
+            with open(self._path(event_id), encoding='utf-8') as f:
+                sheet = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return sheet if sheet.get('version') == version else None
+
+    def set(self, event_id, version, sheet):
+        os.makedirs(self.directory, exist_ok=True)
+        sheet = dict(sheet, version=version)
+        # Write to a temp file and rename so a concurrent export never reads half a file.
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(sheet, f)
+        os.replace(tmp_path, self._path(event_id))
+        return sheet
+
+    def prune(self, keep_event_ids):
+        """Deletes cached sheets of events that no longer exist."""
+        if not os.path.isdir(self.directory):
+            return
+        keep = {f'event_{event_id}.json' for event_id in keep_event_ids}
+        for name in os.listdir(self.directory):
+            if name.startswith('event_') and name.endswith('.json') and name not in keep:
+                os.remove(os.path.join(self.directory, name))
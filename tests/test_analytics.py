@@ -0,0 +1,91 @@
+import pandas as pd
+import pytest
+
+from analytics import gini, summarize_event
+from app import create_app, db, User, Event, Question, Option, Bet
+
+
+def test_gini_bounds():
+    assert gini([10, 10, 10]) == 0.0
+    assert gini([0, 0, 0, 100]) == pytest.approx(0.75)
+    assert gini([]) == 0.0
+
+
+def test_summarize_event():
+    bets = pd.DataFrame([
+        # Settled question 1: option 1 won at 2.0 odds.
+        (1, 'U1', 220, 1, 'Toss', 1, 1, 'Heads', 2.0, 10, 'Won'),
+        (2, 'U2', 190, 1, 'Toss', 1, 2, 'Tails', 1.5, 10, 'Lost'),
+        (3, 'U3', 180, 1, 'Toss', 1, 2, 'Tails', 1.5, 20, 'Lost'),
+        # Open question 2.
+        (4, 'U1', 220, 2, 'Winner', None, 3, 'Alpha', 3.0, 5, 'Pending'),
+        (5, 'U2', 190, 2, 'Winner', None, 4, 'Beta', 1.5, 10, 'Pending'),
+    ], columns=['bet_id', 'user_roll_number', 'points', 'question_id', 'question_text', 'winning_option_id',
+                'option_id', 'option_text', 'odds', 'amount', 'status'])
+
+    summary = summarize_event(7, bets, eligible_users=4)
+
+    assert summary['bets'] == 5
+    assert summary['bettors'] == 3
+    assert summary['participation_rate'] == 0.75
+    assert summary['total_stake'] == 55
+
+    toss, winner = summary['questions']
+    assert toss['settled'] is True
+    assert toss['house_net'] == 40 - 20
+    assert toss['worst_case_house_net'] is None
+    assert [(o['option_text'], o['stake']) for o in toss['options']] == [('Heads', 10), ('Tails', 30)]
+    assert toss['options'][1]['share'] == 0.75
+
+    assert winner['settled'] is False
+    assert winner['house_net'] is None
+    assert winner['worst_case_house_net'] == 15 - 15  # Alpha: 5 * 3.0, Beta: 10 * 1.5
+
+    # ROI on settled stake: U1 +100%, U2 -100%, U3 -100%.
+    assert summary['roi_users'] == 3
+    assert summary['roi_percentiles']['p50'] == -1.0
+    assert summary['roi_percentiles']['p90'] == pytest.approx(0.6)
+
+
+@pytest.fixture
+def admin_client():
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+    with app.app_context():
+        db.create_all()
+        event = Event(name="Cricket")
+        question = Question(text="Toss", event=event)
+        db.session.add_all([
+            User(roll_number='admin', name='Admin', password_hash='x', is_admin=True),
+            User(roll_number='U1', name='Alice', password_hash='x'),
+            User(roll_number='U2', name='Bob', password_hash='x'),
+            event, question,
+            Option(text="Heads", question=question, odds=2.0),
+            Option(text="Tails", question=question, odds=2.0),
+        ])
+        db.session.commit()
+        db.session.add(Bet(user_roll_number='U1', question_id=1, option_id=1, amount=10))
+        db.session.commit()
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['roll_number'] = 'admin'
+    yield app, client
+    with app.app_context():
+        db.drop_all()
+
+
+def test_analytics_cached_until_event_changes(admin_client):
+    app, client = admin_client
+    assert client.get('/admin/analytics/1/data').get_json()['bets'] == 1
+    cached = app.extensions['analytics_cache'][1]
+    assert client.get('/admin/analytics/1/data').get_json()['bets'] == 1
+    assert app.extensions['analytics_cache'][1] is cached
+
+    with app.app_context():
+        db.session.add(Bet(user_roll_number='U2', question_id=1, option_id=2, amount=5))
+        db.session.commit()
+    assert client.get('/admin/analytics/1/data').get_json()['bets'] == 2
+
+    response = client.get('/admin/analytics/1')
+    assert response.status_code == 200
+    assert b'Heads' in response.data
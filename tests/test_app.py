@@ -1,15 +1,23 @@
+import subprocess
+import sys
+
 import pytest
-from app import app, db, User, Bet, Question, Option, Event
+from app import create_app, db, bcrypt, User, Bet, Question, Option, Event
+
+# Hashing is slow on purpose, so every fixture user shares one precomputed hash.
+PASSWORD_HASH = bcrypt.generate_password_hash('password').decode('utf-8')
 
 # This is a "fixture", a setup function that Pytest runs before our tests.
 @pytest.fixture
-def client():
+def app():
     # Configure the app for testing
-    app.config['TESTING'] = True
-    # Use an in-memory SQLite database for tests to keep them isolated
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
-    # Disable CSRF protection in tests
-    app.config['WTF_CSRF_ENABLED'] = False
+    app = create_app({
+        'TESTING': True,
+        # Use an in-memory SQLite database for tests to keep them isolated
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        # Disable CSRF protection in tests
+        'WTF_CSRF_ENABLED': False,
+    })
 
     with app.app_context():
         # Create all the database tables
@@ -17,12 +25,12 @@ def client():
 
         # --- Create Test Data ---
         # Create users with scores designed to test ties
-        u1 = User(roll_number='U1', name='Alice', points=200)
-        u2 = User(roll_number='U2', name='Bob', points=200)
-        u3 = User(roll_number='U3', name='Charlie', points=190)
-        u4 = User(roll_number='U4', name='Diana', points=190)
-        u5 = User(roll_number='U5', name='Eve', points=180)
-        u6 = User(roll_number='U6', name='Frank', points=300) # User with no bets
+        u1 = User(roll_number='U1', name='Alice', points=200, password_hash=PASSWORD_HASH)
+        u2 = User(roll_number='U2', name='Bob', points=200, password_hash=PASSWORD_HASH)
+        u3 = User(roll_number='U3', name='Charlie', points=190, password_hash=PASSWORD_HASH)
+        u4 = User(roll_number='U4', name='Diana', points=190, password_hash=PASSWORD_HASH)
+        u5 = User(roll_number='U5', name='Eve', points=180, password_hash=PASSWORD_HASH)
+        u6 = User(roll_number='U6', name='Frank', points=300, password_hash=PASSWORD_HASH) # User with no bets
         
         db.session.add_all([u1, u2, u3, u4, u5, u6])
 
@@ -42,18 +50,23 @@ def client():
 
         db.session.commit()
 
-    # 'yield' the test client to the test functions
-    with app.test_client() as client:
-        yield client
-    
+    yield app
+
     # Teardown: drop all tables after the test is done
     with app.app_context():
         db.drop_all()
 
 
+@pytest.fixture
+def client(app):
+    # 'yield' the test client to the test functions
+    with app.test_client() as client:
+        yield client
+
+
 ### Test Functions ###
 
-def test_leaderboard_ranking_logic(client):
+def test_leaderboard_ranking_logic(app):
     """
     Tests the core ranking logic directly by calling the helper function.
     This is a pure "unit test".
@@ -124,4 +137,18 @@ def test_leaderboard_api_route(client):
 
     # Check that a user's name from the JSON is correct
     assert data[0]['user']['name'] in ['Alice', 'Bob']
-    assert data[4]['user']['name'] == 'Eve'
\ No newline at end of file
+    assert data[4]['user']['name'] == 'Eve'
+
+
+def test_create_app_defers_export_dependencies():
+    """
+    The Excel exports are admin-only, so building an app and serving a page
+    must not import openpyxl.
+    """
+    code = (
+        "import sys, app\n"
+        "client = app.create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'}).test_client()\n"
+        "assert client.get('/').status_code == 200\n"
+        "assert 'openpyxl' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, '-c', code], check=True)
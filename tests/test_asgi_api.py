@@ -0,0 +1,89 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from starlette.testclient import TestClient
+
+from app import db, bcrypt, User, Bet, Question, Option, Event, Team
+from asgi_api import create_asgi_app
+
+PASSWORD_HASH = bcrypt.generate_password_hash('password').decode('utf-8')
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    # The async engine cannot see an in-memory database owned by another
+    # engine, so both sides share a throwaway SQLite file instead.
+    url = f"sqlite:///{tmp_path / 'api.db'}"
+    engine = create_engine(url)
+    db.metadata.create_all(engine)
+    with Session(engine) as session:
+        event = Event(name="Test Event")
+        question = Question(text="Test Q", event=event)
+        option = Option(text="Test Opt", question=question, odds=2.0)
+        closed = Question(text="Closed Q", event=event, is_open=False)
+        session.add_all([
+            User(roll_number='U1', name='Alice', points=200, password_hash=PASSWORD_HASH),
+            User(roll_number='U2', name='Bob', points=150, password_hash=PASSWORD_HASH),
+            event, question, option, closed,
+            Option(text="Other Opt", question=question, odds=3.0),
+            Team(name='Alpha Wolves', squad='Player 1'),
+        ])
+        session.flush()
+        session.add(Bet(user_roll_number='U2', question_id=question.id, option_id=option.id, amount=10))
+        session.commit()
+    engine.dispose()
+    return url
+
+
+@pytest.fixture
+def async_client(database_url):
+    with TestClient(create_asgi_app({'SQLALCHEMY_DATABASE_URI': database_url})) as client:
+        yield client
+
+
+def login(client, roll_number='U1'):
+    response = client.post('/api/login', json={'roll_number': roll_number, 'password': 'password'})
+    assert response.status_code == 200
+    return {'Authorization': f"Bearer {response.json()['token']}"}
+
+
+def test_login_and_token_errors(async_client):
+    response = async_client.post('/api/login', json={'roll_number': 'U1', 'password': 'wrong'})
+    assert response.status_code == 401
+    assert response.json() == {'message': 'Invalid roll number or password'}
+
+    assert async_client.get('/api/squads').json() == {'message': 'Token is missing!'}
+    response = async_client.get('/api/squads', headers={'Authorization': 'Bearer nope'})
+    assert response.status_code == 401
+
+    response = async_client.get('/api/squads', headers=login(async_client))
+    assert response.json() == [{'id': 1, 'name': 'Alpha Wolves', 'squad': 'Player 1'}]
+
+
+def test_dashboard_and_place_bet(async_client):
+    headers = login(async_client)
+
+    questions = async_client.get('/api/dashboard', headers=headers).json()
+    assert [q['text'] for q in questions] == ['Test Q']
+    assert questions[0]['event_name'] == 'Test Event'
+    assert [o['odds'] for o in questions[0]['options']] == [2.0, 3.0]
+
+    response = async_client.post('/api/bets/place/1', json={'amount': 20, 'option_id': 1}, headers=headers)
+    assert response.status_code == 201
+    assert response.json()['new_points'] == 180
+
+    response = async_client.post('/api/bets/place/1', json={'amount': 20, 'option_id': 1}, headers=headers)
+    assert response.status_code == 409
+    response = async_client.post('/api/bets/place/2', json={'amount': 20, 'option_id': 1}, headers=headers)
+    assert response.status_code == 403
+
+    assert async_client.get('/api/dashboard', headers=headers).json() == []
+    bets = async_client.get('/api/my-bets', headers=headers).json()
+    assert bets[0]['question_text'] == 'Test Q'
+    assert bets[0]['option_text'] == 'Test Opt'
+
+
+def test_leaderboard(async_client):
+    async_data = async_client.get('/api/leaderboard').json()
+    assert async_data == [{'rank': 1, 'user': {'roll_number': 'U2', 'name': 'Bob',
+                                               'points': 150, 'is_admin': False}}]
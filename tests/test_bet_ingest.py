@@ -0,0 +1,116 @@
+import threading
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+
+from bet_ingest import GroupCommitQueue, QueueTimeout
+from app import create_app, db, User, Event, Question, Option, Bet
+
+
+def test_items_are_committed_in_batches():
+    batches = []
+    release = threading.Event()
+
+    def commit_batch(payloads):
+        release.wait()
+        batches.append(payloads)
+        return [ValueError('odd') if p % 2 else p * 10 for p in payloads]
+
+    ingest = GroupCommitQueue(commit_batch, max_batch_size=8, max_wait=0.05)
+    results = {}
+
+    def submit(n):
+        try:
+            results[n] = ingest.submit(n)
+        except ValueError as exc:
+            results[n] = str(exc)
+
+    threads = [threading.Thread(target=submit, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == {n: ('odd' if n % 2 else n * 10) for n in range(8)}
+    assert sum(len(b) for b in batches) == 8
+    assert len(batches) < 8
+
+
+def test_failed_commit_fails_every_item_and_timeout_withdraws():
+    def commit_batch(payloads):
+        raise RuntimeError('disk full')
+
+    with pytest.raises(RuntimeError):
+        GroupCommitQueue(commit_batch).submit('bet')
+
+    committed = []
+    started, stuck = threading.Event(), threading.Event()
+
+    def slow_commit(payloads):
+        started.set()
+        stuck.wait()
+        committed.extend(payloads)
+        return payloads
+
+    ingest = GroupCommitQueue(slow_commit, max_batch_size=1, max_wait=0, timeout=0.05)
+    threading.Thread(target=ingest.submit, args=('first',), daemon=True).start()
+    started.wait()
+    with pytest.raises(QueueTimeout):
+        ingest.submit('second')  # queued behind 'first' and withdrawn
+    stuck.set()
+    assert ingest.submit('third') == 'third'
+    assert committed == ['first', 'third']
+
+
+@pytest.fixture
+def app(tmp_path):
+    # The writer thread needs its own connection, so use a file instead of :memory:.
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'bets.db'}",
+                      'BET_INGEST_MODE': 'batched', 'BET_BATCH_MAX_WAIT': 0.05,
+                      'RATE_LIMITS': {}})
+    with app.app_context():
+        db.create_all()
+        event = Event(name="Cricket")
+        question = Question(text="Toss", event=event)
+        db.session.add_all([event, question, Option(text="Heads", question=question, odds=2.0)])
+        db.session.add_all([User(roll_number=f'U{n}', name=f'User {n}', password_hash='x', points=20)
+                            for n in range(10)])
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+def token_for(app, roll_number):
+    return jwt.encode({'roll_number': roll_number, 'exp': datetime.utcnow() + timedelta(minutes=5)},
+                      app.config['JWT_SECRET_KEY'], algorithm="HS256")
+
+
+def test_batched_api_bets(app):
+    responses = {}
+
+    def place(roll_number, amount):
+        client = app.test_client()
+        response = client.post('/api/bets/place/1', json={'amount': amount, 'option_id': 1},
+                               headers={'Authorization': f'Bearer {token_for(app, roll_number)}'})
+        responses.setdefault(roll_number, []).append((response.status_code, response.get_json()))
+
+    threads = [threading.Thread(target=place, args=(f'U{n}', 5)) for n in range(10)]
+    threads.append(threading.Thread(target=place, args=('U0', 5)))  # duplicate bet
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(status for status, _ in responses['U0']) == [201, 409]
+    for n in range(1, 10):
+        assert responses[f'U{n}'] == [(201, {'message': 'Bet of 5 points placed successfully!', 'new_points': 15})]
+
+    stats = app.extensions['bet_ingest'].stats()
+    assert stats['items'] == 11
+    assert stats['batches'] < 11
+    with app.app_context():
+        assert Bet.query.count() == 10
+        assert db.session.get(User, 'U3').points == 15
@@ -0,0 +1,73 @@
+from io import BytesIO
+
+import pytest
+from openpyxl import load_workbook
+
+import app as app_module
+from app import create_app, db, User, Event, Question, Option, Bet
+
+
+@pytest.fixture
+def admin_client(tmp_path):
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+                      'EXPORT_CACHE_DIR': str(tmp_path / 'export_cache')})
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            User(roll_number='admin', name='Admin', password_hash='x', is_admin=True),
+            User(roll_number='U1', name='Alice', password_hash='x', points=190),
+            User(roll_number='U2', name='Bob', password_hash='x', points=195),
+        ])
+        for name in ('Cricket', 'Football'):
+            event = Event(name=name)
+            question = Question(text=f"{name} winner", event=event)
+            db.session.add_all([event, question,
+                                Option(text="Alpha", question=question, odds=2.0),
+                                Option(text="Beta", question=question, odds=1.5)])
+        db.session.commit()
+        db.session.add_all([
+            Bet(user_roll_number='U1', question_id=1, option_id=1, amount=10),
+            Bet(user_roll_number='U2', question_id=2, option_id=4, amount=5),
+        ])
+        db.session.commit()
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['roll_number'] = 'admin'
+    yield app, client
+    with app.app_context():
+        db.drop_all()
+
+
+def download(client):
+    response = client.get('/admin/download_bets')
+    assert response.status_code == 200
+    return load_workbook(BytesIO(response.data))
+
+
+def test_only_changed_event_sheets_are_rebuilt(admin_client, monkeypatch):
+    app, client = admin_client
+    built = []
+    build = app_module.build_bets_sheet
+    monkeypatch.setattr(app_module, 'build_bets_sheet', lambda event: built.append(event.name) or build(event))
+
+    wb = download(client)
+    assert wb.sheetnames == ['Cricket', 'Football']
+    assert built == ['Cricket', 'Football']
+    assert [c.value for c in wb['Cricket'][2]] == [
+        wb['Cricket']['A2'].value, 'U1', 'Alice', None, 'Alpha', 'Pending', 10, 2, 0, 190]
+
+    download(client)
+    assert built == ['Cricket', 'Football']
+
+    # Settling Cricket rebuilds only its sheet; Final Score is always current.
+    with app.app_context():
+        question = db.session.get(Question, 1)
+        question.winning_option_id = 1
+        db.session.get(Bet, 1).status = 'Won'
+        db.session.get(User, 'U1').points = 210
+        db.session.commit()
+    wb = download(client)
+    assert built == ['Cricket', 'Football', 'Cricket']
+    row = [c.value for c in wb['Cricket'][2]]
+    assert row[5:] == ['Alpha', 10, 2, 10, 210]
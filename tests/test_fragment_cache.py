@@ -0,0 +1,61 @@
+import pytest
+from fragment_cache import FragmentCache
+from app import create_app, db, User, Team, DataVersion
+
+
+def test_lru_eviction_is_bounded_by_size():
+    cache = FragmentCache(max_bytes=10)
+    cache.set('a', 'aaaa')
+    cache.set('b', 'bbbb')
+    assert cache.get('a') == 'aaaa'  # 'a' becomes most recently used
+
+    cache.set('c', 'cccc')
+    assert cache.get('b') is None
+    assert cache.get('a') == 'aaaa'
+    assert cache.get('c') == 'cccc'
+    assert cache.current_bytes == 8
+
+    # Fragments larger than the whole budget are returned but never stored.
+    assert cache.set('d', 'x' * 11) == 'x' * 11
+    assert cache.get('d') is None
+
+
+@pytest.fixture
+def app():
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+    with app.app_context():
+        db.create_all()
+        db.session.add(Team(name='Alpha Wolves', squad='Player 1'))
+        db.session.add(User(roll_number='U1', name='Alice', password_hash='x'))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+def test_orm_changes_bump_data_versions(app):
+    with app.app_context():
+        versions = dict(db.session.execute(db.select(DataVersion.scope, DataVersion.version)).all())
+        assert versions == {'teams': 1, 'users': 1}
+
+        db.session.get(User, 'U1').points += 5
+        db.session.commit()
+        assert db.session.get(DataVersion, 'users').version == 2
+        assert db.session.get(DataVersion, 'teams').version == 1
+
+
+def test_squads_served_from_cache_until_teams_change(app):
+    cache = app.extensions['fragment_cache']
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['roll_number'] = 'U1'
+
+    assert b'Player 1' in client.get('/squads').data
+    assert b'Player 1' in client.get('/squads').data
+    assert (cache.misses, cache.hits) == (1, 1)
+
+    with app.app_context():
+        db.session.get(Team, 1).squad = 'Player 2'
+        db.session.commit()
+    assert b'Player 2' in client.get('/squads').data
+    assert cache.misses == 2
@@ -0,0 +1,87 @@
+import pytest
+
+from ratelimit import MemoryBucketStore, RateLimiter, SQLiteBucketStore
+from app import create_app, db, bcrypt, User
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.parametrize('make_store', [
+    lambda tmp_path: MemoryBucketStore(),
+    lambda tmp_path: SQLiteBucketStore(str(tmp_path / 'buckets.db')),
+])
+def test_token_bucket_refills(tmp_path, make_store):
+    clock = FakeClock()
+    limiter = RateLimiter({'login': (2, 10)}, make_store(tmp_path), clock=clock)
+    keys = [('ip', '1.2.3.4')]
+
+    assert limiter.check('login', keys) is None
+    assert limiter.check('login', keys) is None
+    assert limiter.check('login', keys) == 5  # one token refills every 5 seconds
+    assert limiter.check('login', [('ip', '5.6.7.8')]) is None
+
+    clock.now += 5
+    assert limiter.check('login', keys) is None
+    assert limiter.rejections == {'login:ip': 1}
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'buckets.db')
+    clock = FakeClock()
+    first = RateLimiter({'bet': (1, 60)}, SQLiteBucketStore(path), clock=clock)
+    second = RateLimiter({'bet': (1, 60)}, SQLiteBucketStore(path), clock=clock)
+    assert first.check('bet', [('user', 'U1')]) is None
+    assert second.check('bet', [('user', 'U1')]) == 60
+
+
+def test_concurrency_cap():
+    limiter = RateLimiter({}, max_concurrent=1)
+    assert limiter.acquire_slot()
+    assert not limiter.acquire_slot()
+    limiter.release_slot()
+    assert limiter.acquire_slot()
+    assert limiter.rejections == {'concurrency': 1}
+
+
+@pytest.fixture
+def app():
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+                      'RATE_LIMITS': {'login': (2, 60)}})
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(roll_number='U1', name='Alice',
+                            password_hash=bcrypt.generate_password_hash('password').decode('utf-8')))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+def test_api_login_is_rate_limited(app):
+    client = app.test_client()
+    for _ in range(2):
+        response = client.post('/api/login', json={'roll_number': 'U1', 'password': 'wrong'})
+        assert response.status_code == 401
+
+    response = client.post('/api/login', json={'roll_number': 'U1', 'password': 'password'})
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '30'
+    assert app.extensions['rate_limiter'].rejections['login:ip'] == 1
+
+
+def test_requests_shed_when_saturated():
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+                      'MAX_CONCURRENT_REQUESTS': 1})
+    limiter = app.extensions['rate_limiter']
+    assert limiter.acquire_slot()  # a request already in flight
+
+    response = app.test_client().get('/api/leaderboard')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert limiter.in_flight == 1